@@ -10,21 +10,34 @@ import os
 import re
 import sys
 import csv
+import gzip
 import json
 import time
+import hashlib
 import base64
+import threading
 import urllib.parse
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Optional
 
 try:
     import requests
-    from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from lxml import html as lxml_html
 except ImportError:
     print("[ERROR] Fehlende Module. Bitte installieren:")
-    print("  pip install requests beautifulsoup4 lxml")
+    print("  pip install requests lxml")
     sys.exit(1)
 
+# Optional: HTTP/2-Client für Airtable (Multiplexing über eine Verbindung)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 # ===========================================================================
 # KONFIGURATION
 # ===========================================================================
@@ -37,8 +50,84 @@ AIRTABLE_TOKEN = os.getenv("AIRTABLE_TOKEN", "")
 AIRTABLE_BASE = os.getenv("AIRTABLE_BASE", "")
 AIRTABLE_TABLE_ID = os.getenv("AIRTABLE_TABLE_ID", "")
 
-# Rate Limiting
-REQUEST_DELAY = 1.5
+# Rate Limiting: max. Requests pro Sekunde gegen die Website
+SCRAPE_RATE_LIMIT = 4.0
+
+# Parallele Worker für Detailseiten
+MAX_WORKERS = 6
+
+# Airtable: max. 5 Requests pro Sekunde pro Base, bis zu 5 Batches parallel
+AIRTABLE_RATE_LIMIT = 5.0
+AIRTABLE_BATCH_WORKERS = 5
+
+# ===========================================================================
+# HTTP SESSIONS
+# ===========================================================================
+# Persistente Sessions mit Connection-Pooling: spart TCP/TLS-Handshake
+# pro Request, da beide Hosts (Website + Airtable) mehrfach angefragt werden.
+
+class _RateLimiter:
+    """Einfacher Token-Bucket: max. `rate` Requests pro Sekunde, threadsicher"""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+SCRAPE_LIMITER = _RateLimiter(SCRAPE_RATE_LIMIT)
+AIRTABLE_LIMITER = _RateLimiter(AIRTABLE_RATE_LIMIT)
+
+def _make_session(extra_headers: dict = None) -> requests.Session:
+    """Erstelle Session mit Keep-Alive, Pooling und Retry"""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # urllib3 wiederholt per Default nur idempotente Verben - ohne
+        # dies bekämen die POST/PATCH-Batches gar keine Status-Retries
+        allowed_methods=None,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if extra_headers:
+        session.headers.update(extra_headers)
+    return session
+
+SCRAPE_SESSION = _make_session({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+})
+
+AIRTABLE_SESSION = _make_session()
+
+# HTTP/2 bündelt alle parallelen Batch-Requests als Streams über eine
+# einzige TLS-Verbindung (ein Handshake pro Lauf, HPACK-Header-Kompression).
+# retries=3 deckt Verbindungsfehler ab; 429/5xx behandelt _airtable_send.
+if httpx is not None:
+    AIRTABLE_HTTPX = httpx.Client(
+        timeout=30.0,
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        ),
+    )
+else:
+    AIRTABLE_HTTPX = None
+
+# Status-Retries auf dem httpx-Pfad, Gegenstück zur Retry-Policy
+# (status_forcelist) des requests-Adapters
+AIRTABLE_RETRY_STATUSES = (429, 500, 502, 503, 504)
+AIRTABLE_MAX_RETRIES = 3
 
 # ===========================================================================
 # REGEX PATTERNS
@@ -46,6 +135,22 @@ REQUEST_DELAY = 1.5
 
 RE_PLZ_ORT = re.compile(r"\b(\d{5})\s+([A-ZÄÖÜ][a-zäöüß\-\s/]+)")
 RE_PRICE = re.compile(r"([\d.,]+)\s*€")
+RE_WS = re.compile(r"\s+")
+# In Prioritätsreihenfolge: "Kaufpreis" wird im ganzen Text gesucht, bevor
+# das generische "Preis"-Pattern als Fallback greift - eine Alternation würde
+# stattdessen den leftmost-Treffer beider Label nehmen
+RE_KAUFPREIS = re.compile(r"Kaufpreis[:\s]+€?\s*([\d.]+(?:,\d+)?)\s*€", re.IGNORECASE)
+RE_PREIS = re.compile(r"Preis[:\s]+€?\s*([\d.]+(?:,\d+)?)\s*€", re.IGNORECASE)
+RE_ORT_SEP = re.compile(r"\s*[-–/]\s*")
+RE_ORT_TAIL = re.compile(r"\s+(angeboten|von|der|die|das|GmbH|Immobilien).*$", re.IGNORECASE)
+RE_TITLE_FALLBACK = re.compile(r"(Wohnung|Haus|Villa|Doppelhaushälfte|Einfamilienhaus|Mehrfamilienhaus)\s+(?:in|im)\s+[A-Z][\w\s-]+")
+RE_PHAST_SRC = re.compile(r"src=([^&]+)")
+RE_TITLE_CANDIDATE = re.compile(r"\b([A-ZÄÖÜ][a-zäöüß]{3,})\b")
+RE_SKIP_IMG = re.compile(r"logo|icon|avatar|favicon", re.IGNORECASE)
+
+# Deutsche Zahlenformate in einem Durchlauf normalisieren:
+# Punkt (Tausendertrennzeichen) raus, Komma wird Dezimalpunkt
+_PRICE_TRANSLATE = str.maketrans({".": None, ",": "."})
 
 # ===========================================================================
 # STOPWORDS
@@ -58,19 +163,23 @@ STOP_STRINGS = [
     "Kontaktieren Sie mich", "IMMO-SHOP", "Wasilios Totsikas"
 ]
 
+# Eine Alternation statt |STOP_STRINGS| einzelner Substring-Scans pro Zeile
+STOP_RE = re.compile("|".join(re.escape(s) for s in STOP_STRINGS))
+
+# Wörter, die im Titel-Fallback nie als Ortsname gelten
+TITLE_BLACKLIST = frozenset({"Wohnung", "Haus", "Villa", "Modernes"})
+
 # ===========================================================================
 # HELPER FUNCTIONS
 # ===========================================================================
 
+@lru_cache(maxsize=2048)
 def decode_phastpress_url(phast_url: str) -> str:
-    """Dekodiere phastpress-URL um echte Bild-URL zu erhalten"""
+    """Dekodiere phastpress-URL um echte Bild-URL zu erhalten (gecacht, da pur)"""
     if "phastpress/phast.php/" not in phast_url:
         return phast_url
-    
+
     try:
-        import base64
-        import urllib.parse
-        
         # Extrahiere Base64-Teil
         parts = phast_url.split("/phast.php/")
         if len(parts) < 2:
@@ -98,7 +207,7 @@ def decode_phastpress_url(phast_url: str) -> str:
         
         # Extrahiere echte URL aus "service=images&src=URL_ENCODED&..."
         if "src=" in decoded:
-            match = re.search(r'src=([^&]+)', decoded)
+            match = RE_PHAST_SRC.search(decoded)
             if match:
                 url_encoded = match.group(1)
                 real_url = urllib.parse.unquote(url_encoded)
@@ -108,11 +217,21 @@ def decode_phastpress_url(phast_url: str) -> str:
     
     return phast_url
 
+def _largest_srcset_url(srcset: str) -> str:
+    """Hole die URL des letzten (größten) srcset-Eintrags.
+
+    rfind statt split(","): der häufige Fall mit 1-2 Einträgen kommt
+    ohne Listen-Allokation und Strip pro Eintrag aus.
+    """
+    i = srcset.rfind(",")
+    tail = srcset[i + 1:] if i >= 0 else srcset
+    return tail.strip().split(" ", 1)[0]
+
 def _norm(s: str) -> str:
     """Normalisiere String"""
     if not s:
         return ""
-    s = re.sub(r"\s+", " ", s).strip()
+    s = RE_WS.sub(" ", s).strip()
     return s
 
 def _clean_desc_lines(lines: List[str]) -> List[str]:
@@ -126,7 +245,7 @@ def _clean_desc_lines(lines: List[str]) -> List[str]:
             continue
         
         # Filtere Stopwords
-        if any(stop in line for stop in STOP_STRINGS):
+        if STOP_RE.search(line):
             continue
         
         # Dedupliziere
@@ -138,15 +257,54 @@ def _clean_desc_lines(lines: List[str]) -> List[str]:
     
     return cleaned
 
-def soup_get(url: str, delay: float = REQUEST_DELAY) -> BeautifulSoup:
-    """Hole HTML und parse mit BeautifulSoup"""
-    time.sleep(delay)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-    r = requests.get(url, headers=headers, timeout=30)
+def tree_get(url: str) -> "lxml_html.HtmlElement":
+    """Hole HTML und parse direkt mit lxml (ohne BS4-Wrapper)"""
+    SCRAPE_LIMITER.acquire()
+    r = SCRAPE_SESSION.get(url, timeout=30)
     r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml")
+    return lxml_html.fromstring(r.content)
+
+# Conditional-GET-State: ETag/Last-Modified + gecachte Artikel pro Übersichtsseite
+STATE_FILE = ".besigheim_etags.json"
+
+def _load_state() -> dict:
+    """Lade Conditional-GET-State der Übersichtsseiten"""
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state: dict):
+    """Speichere Conditional-GET-State"""
+    try:
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"[WARN] Konnte {STATE_FILE} nicht schreiben: {e}")
+
+def tree_get_conditional(url: str, cached: dict) -> tuple:
+    """Hole HTML mit If-None-Match/If-Modified-Since.
+
+    Gibt (tree, validators) zurück; bei 304 ist tree None und der
+    Aufrufer kann die gecachten Daten weiterverwenden.
+    """
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("lm"):
+        headers["If-Modified-Since"] = cached["lm"]
+
+    SCRAPE_LIMITER.acquire()
+    r = SCRAPE_SESSION.get(url, timeout=30, headers=headers or None)
+    if r.status_code == 304:
+        return None, None
+    r.raise_for_status()
+    validators = {
+        "etag": r.headers.get("ETag", ""),
+        "lm": r.headers.get("Last-Modified", ""),
+    }
+    return lxml_html.fromstring(r.content), validators
 
 # ===========================================================================
 # AIRTABLE FUNCTIONS
@@ -165,28 +323,30 @@ def airtable_headers() -> dict:
         "Content-Type": "application/json"
     }
 
+# Headers einmalig auf der Session setzen statt pro Request
+AIRTABLE_SESSION.headers.update(airtable_headers())
+if AIRTABLE_HTTPX is not None:
+    AIRTABLE_HTTPX.headers.update(airtable_headers())
+
 def airtable_list_all() -> tuple:
     """Liste alle Records aus Airtable"""
     url = f"https://api.airtable.com/v0/{airtable_table_segment()}"
-    headers = airtable_headers()
-    
+
     all_records = []
     offset = None
-    
+
     while True:
         params = {"pageSize": 100}
         if offset:
             params["offset"] = offset
-        
-        r = requests.get(url, headers=headers, params=params, timeout=30)
-        r.raise_for_status()
+
+        r = _airtable_request("GET", url, params=params)
         data = r.json()
-        
+
         all_records.extend(data.get("records", []))
         offset = data.get("offset")
         if not offset:
             break
-        time.sleep(0.2)
     
     ids = [rec["id"] for rec in all_records]
     fields = [rec.get("fields", {}) for rec in all_records]
@@ -199,41 +359,106 @@ def airtable_existing_fields() -> set:
         return set()
     return set(all_fields[0].keys())
 
+# Request-Bodies erst ab dieser Größe komprimieren, kleine Updates
+# würden durch den Gzip-Overhead sonst größer
+GZIP_MIN_BYTES = 1024
+
+# Wird zur Laufzeit auf False gesetzt, falls die API komprimierte
+# Bodies ablehnt - gzip ist dort nicht offiziell dokumentiert
+_AIRTABLE_GZIP_OK = True
+
+def _airtable_send(method: str, url: str, params: dict = None, body: bytes = None, headers: dict = None):
+    """Roher Airtable-Send, global auf 5 Requests/s limitiert.
+
+    Auf dem httpx-Pfad werden 429/5xx-Antworten mit Backoff wiederholt;
+    die requests-Session deckt das über ihre Retry-Policy ab
+    (allowed_methods=None, also auch POST/PATCH).
+    """
+    AIRTABLE_LIMITER.acquire()
+    if AIRTABLE_HTTPX is None:
+        return AIRTABLE_SESSION.request(method, url, params=params, data=body, headers=headers, timeout=30)
+
+    r = AIRTABLE_HTTPX.request(method, url, params=params, content=body, headers=headers)
+    for attempt in range(AIRTABLE_MAX_RETRIES):
+        if r.status_code not in AIRTABLE_RETRY_STATUSES:
+            break
+        # Retry-After respektieren, sonst exponentieller Backoff
+        # analog zu backoff_factor=0.5 des requests-Adapters
+        try:
+            wait = float(r.headers.get("Retry-After", ""))
+        except ValueError:
+            wait = 0.5 * (2 ** attempt)
+        time.sleep(wait)
+        AIRTABLE_LIMITER.acquire()
+        r = AIRTABLE_HTTPX.request(method, url, params=params, content=body, headers=headers)
+    return r
+
+def _airtable_request(method: str, url: str, params: dict = None, payload: dict = None):
+    """Einzelner Airtable-Request, große Bodies probeweise gzip-komprimiert"""
+    global _AIRTABLE_GZIP_OK
+
+    raw_body = None
+    body = None
+    headers = None
+    if payload is not None:
+        raw_body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        body = raw_body
+        if _AIRTABLE_GZIP_OK and len(raw_body) >= GZIP_MIN_BYTES:
+            # Spart bei langen Beschreibungen deutlich Bytes im Upload
+            body = gzip.compress(raw_body)
+            headers = {"Content-Encoding": "gzip"}
+
+    r = _airtable_send(method, url, params=params, body=body, headers=headers)
+
+    # Lehnt der Endpoint den komprimierten Body ab (4xx, außer Rate-Limit),
+    # denselben Request unkomprimiert wiederholen und die Kompression für
+    # den Rest des Laufs abschalten, statt den Sync abbrechen zu lassen
+    if headers is not None and 400 <= r.status_code < 500 and r.status_code != 429:
+        _AIRTABLE_GZIP_OK = False
+        print(f"[WARN] Airtable lehnt gzip-Body ab ({r.status_code}) - sende unkomprimiert weiter")
+        r = _airtable_send(method, url, params=params, body=raw_body)
+
+    r.raise_for_status()
+    return r
+
+def _airtable_send_batches(method: str, url: str, request_kwargs: List[dict]):
+    """Sende vorbereitete Batch-Requests mit mehreren parallel in-flight"""
+    if not request_kwargs:
+        return
+    with ThreadPoolExecutor(max_workers=AIRTABLE_BATCH_WORKERS) as ex:
+        futures = [
+            ex.submit(_airtable_request, method, url, **kw)
+            for kw in request_kwargs
+        ]
+        for fut in as_completed(futures):
+            fut.result()
+
 def airtable_batch_create(records: List[dict]):
     """Erstelle Records in Batches"""
     url = f"https://api.airtable.com/v0/{airtable_table_segment()}"
-    headers = airtable_headers()
-    
-    for i in range(0, len(records), 10):
-        batch = records[i:i+10]
-        payload = {"records": [{"fields": r} for r in batch]}
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
-        r.raise_for_status()
-        time.sleep(0.2)
+    payloads = [
+        {"payload": {"records": [{"fields": r} for r in records[i:i+10]]}}
+        for i in range(0, len(records), 10)
+    ]
+    _airtable_send_batches("POST", url, payloads)
 
 def airtable_batch_update(updates: List[dict]):
     """Update Records in Batches"""
     url = f"https://api.airtable.com/v0/{airtable_table_segment()}"
-    headers = airtable_headers()
-    
-    for i in range(0, len(updates), 10):
-        batch = updates[i:i+10]
-        payload = {"records": batch}
-        r = requests.patch(url, headers=headers, json=payload, timeout=30)
-        r.raise_for_status()
-        time.sleep(0.2)
+    payloads = [
+        {"payload": {"records": updates[i:i+10]}}
+        for i in range(0, len(updates), 10)
+    ]
+    _airtable_send_batches("PATCH", url, payloads)
 
 def airtable_batch_delete(record_ids: List[str]):
     """Lösche Records in Batches"""
     url = f"https://api.airtable.com/v0/{airtable_table_segment()}"
-    headers = airtable_headers()
-    
-    for i in range(0, len(record_ids), 10):
-        batch = record_ids[i:i+10]
-        params = {"records[]": batch}
-        r = requests.delete(url, headers=headers, params=params, timeout=30)
-        r.raise_for_status()
-        time.sleep(0.2)
+    payloads = [
+        {"params": {"records[]": record_ids[i:i+10]}}
+        for i in range(0, len(record_ids), 10)
+    ]
+    _airtable_send_batches("DELETE", url, payloads)
 
 def sanitize_record_for_airtable(record: dict, allowed_fields: set) -> dict:
     """Bereinige Record für Airtable"""
@@ -247,25 +472,18 @@ def sanitize_record_for_airtable(record: dict, allowed_fields: set) -> dict:
 
 def extract_price(page_text: str) -> str:
     """Extrahiere Preis aus dem Seitentext"""
-    # Suche nach verschiedenen Preis-Patterns
-    patterns = [
-        r"Kaufpreis[:\s]+€?\s*([\d.]+(?:,\d+)?)\s*€",
-        r"Preis[:\s]+€?\s*([\d.]+(?:,\d+)?)\s*€",
-    ]
-    
-    for pattern in patterns:
-        m = re.search(pattern, page_text, re.IGNORECASE)
-        if m:
-            preis_str = m.group(1)
-            # Entferne Punkte (Tausendertrennzeichen) und ersetze Komma durch Punkt
-            preis_clean = preis_str.replace(".", "").replace(",", ".")
+    # Patterns in Prioritätsreihenfolge; unplausible Treffer werden
+    # übersprungen statt die Suche abzubrechen
+    for pattern in (RE_KAUFPREIS, RE_PREIS):
+        for m in pattern.finditer(page_text):
+            preis_clean = m.group(1).translate(_PRICE_TRANSLATE)
             try:
                 preis_num = float(preis_clean)
-                if preis_num > 100:  # Plausibilitätsprüfung
-                    return f"€{int(preis_num):,}".replace(",", ".")
-            except:
+            except ValueError:
                 continue
-    
+            if preis_num > 100:  # Plausibilitätsprüfung
+                return f"€{int(preis_num):,}".replace(",", ".")
+
     return ""
 
 def parse_price_to_number(preis_str: str) -> Optional[float]:
@@ -273,12 +491,9 @@ def parse_price_to_number(preis_str: str) -> Optional[float]:
     if not preis_str:
         return None
     
-    # Entferne Euro-Symbol und Whitespace
-    clean = preis_str.replace("€", "").strip()
-    
-    # Deutsche Zahlenformate: 489.250 €
-    # Entferne Punkte (Tausendertrennzeichen) und ersetze Komma durch Punkt
-    clean = clean.replace(".", "").replace(",", ".")
+    # Entferne Euro-Symbol und Whitespace, dann deutsche Zahlenformate
+    # (z.B. 489.250 €) in einem Durchlauf normalisieren
+    clean = preis_str.replace("€", "").strip().translate(_PRICE_TRANSLATE)
     
     try:
         return float(clean)
@@ -287,18 +502,18 @@ def parse_price_to_number(preis_str: str) -> Optional[float]:
 
 def extract_plz_ort(text: str, title: str = "") -> str:
     """Extrahiere PLZ und Ort aus Text"""
-    # Zuerst im kompletten Text suchen
-    matches = list(RE_PLZ_ORT.finditer(text))
-    
-    if matches:
-        m = matches[0]
+    # Zuerst im kompletten Text suchen - search stoppt beim ersten Treffer,
+    # statt wie finditer alle Vorkommen einzusammeln
+    m = RE_PLZ_ORT.search(text)
+
+    if m:
         plz = m.group(1)
         ort = m.group(2).strip()
         
         # Bereinige Ort
-        ort = re.split(r'\s*[-–/]\s*', ort)[0].strip()
-        ort = re.sub(r'\s+(angeboten|von|der|die|das|GmbH|Immobilien).*$', '', ort, flags=re.IGNORECASE).strip()
-        ort = re.sub(r"\s+", " ", ort).strip()
+        ort = RE_ORT_SEP.split(ort)[0].strip()
+        ort = RE_ORT_TAIL.sub('', ort).strip()
+        ort = RE_WS.sub(" ", ort).strip()
         
         if len(ort.split()) > 2:
             ort = " ".join(ort.split()[:2])
@@ -309,9 +524,9 @@ def extract_plz_ort(text: str, title: str = "") -> str:
     # Titel enthält oft nur den Ortsnamen
     if title:
         # Suche nach bekannten Orten in der Region
-        for match in re.finditer(r'\b([A-ZÄÖÜ][a-zäöüß]{3,})\b', title):
+        for match in RE_TITLE_CANDIDATE.finditer(title):
             ort = match.group(1)
-            if ort not in ["Wohnung", "Haus", "Villa", "Modernes"]:
+            if ort not in TITLE_BLACKLIST:
                 return ort
     
     return ""
@@ -325,22 +540,26 @@ def extract_objektnummer(url: str) -> str:
         return slug
     return ""
 
-def extract_description(soup: BeautifulSoup) -> str:
+def extract_description(tree: "lxml_html.HtmlElement") -> str:
     """Extrahiere Beschreibung von Detailseite"""
     lines = []
-    
-    # Suche nach Beschreibungstexten
-    for p in soup.find_all("p"):
-        text = _norm(p.get_text(" ", strip=True))
-        if text and len(text) > 50:
-            if not any(skip in text for skip in STOP_STRINGS):
-                lines.append(text)
-    
+
+    # Suche nach Beschreibungstexten (XPath + text_content laufen in C)
+    for p in tree.xpath("//p"):
+        raw = p.text_content()
+        # Kurze Absätze (Nav-Items, Captions) sofort verwerfen -
+        # die Normalisierung kann den Text nur noch kürzer machen
+        if len(raw) <= 50:
+            continue
+        text = _norm(raw)
+        if len(text) > 50 and not STOP_RE.search(text):
+            lines.append(text)
+
     lines = _clean_desc_lines(lines)
-    
+
     if lines:
         return "\n\n".join(lines[:10])[:12000]
-    
+
     return ""
 
 # ===========================================================================
@@ -350,51 +569,78 @@ def extract_description(soup: BeautifulSoup) -> str:
 def collect_detail_links_with_images() -> List[tuple]:
     """Sammle alle Detailseiten-Links MIT Bildern von der Übersichtsseite"""
     all_data = []
+    seen_urls = set()
+    state = _load_state()
     page = 1
-    
+
     while True:
         if page == 1:
             page_url = LIST_URL
         else:
             page_url = f"{LIST_URL}page/{page}/"
-        
+
         print(f"[LIST] Hole Seite {page}: {page_url}")
-        
+
+        cached = state.get(page_url, {})
         try:
-            soup = soup_get(page_url)
+            tree, validators = tree_get_conditional(page_url, cached)
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 print(f"[LIST] Seite {page} nicht gefunden - Ende der Pagination")
                 break
             raise
-        
+
         page_data = []
-        
-        # Suche nach Immobilien-Artikeln
+
+        if tree is None:
+            # 304: Seite unverändert - Transfer + Parsing komplett gespart
+            print(f"[LIST] Seite {page} unverändert (304) - verwende gecachte Links")
+            page_items = [tuple(item) for item in cached.get("items", [])]
+            has_next_page = cached.get("has_next", False)
+            for full_url, image_url in page_items:
+                if full_url not in seen_urls:
+                    seen_urls.add(full_url)
+                    all_data.append((full_url, image_url))
+                    page_data.append(full_url)
+
+            print(f"[LIST] Seite {page}: {len(page_data)} neue Immobilien gefunden")
+
+            if len(page_data) == 0:
+                print(f"[LIST] Keine neuen Links auf Seite {page} - Ende der Pagination")
+                break
+            if not has_next_page and len(page_data) < 12:
+                print(f"[LIST] Weniger als 12 Links und kein 'Next' Link - letzte Seite erreicht")
+                break
+            page += 1
+            if page > 20:
+                print(f"[WARN] Sicherheits-Break bei Seite 20")
+                break
+            continue
+
+        # Suche nach Immobilien-Artikeln via XPath (C-Level statt Python-Loop)
         # Verschiedene Ansätze probieren
-        articles = []
-        
         # Ansatz 1: Suche nach class="frymo-listing-item"
-        articles = soup.find_all("article", class_="frymo-listing-item")
-        
+        articles = tree.xpath('//article[contains(@class, "frymo-listing-item")]')
+
         if not articles:
             # Ansatz 2: Suche nach article mit beliebiger class die "frymo" enthält
-            articles = soup.find_all("article", class_=lambda x: x and "frymo" in str(x).lower())
-        
+            articles = tree.xpath('//article[contains(@class, "frymo") or contains(@class, "Frymo")]')
+
         if not articles:
-            # Ansatz 3: Alle articles, dann filtern
-            all_articles = soup.find_all("article")
-            articles = [a for a in all_articles if a.find("a", href=lambda h: h and "/immobilie/" in h)]
-        
+            # Ansatz 3: Alle articles mit Immobilien-Link
+            articles = tree.xpath('//article[.//a[contains(@href, "/immobilie/")]]')
+
         print(f"[DEBUG] Gefunden: {len(articles)} Artikel-Elemente")
-        
+
+        page_items = []
+
         for article in articles:
             # Suche Link im Artikel
-            link = article.find("a", href=True)
-            if not link:
+            hrefs = article.xpath('.//a/@href')
+            if not hrefs:
                 continue
-            
-            href = link["href"]
+
+            href = hrefs[0]
             if "/immobilie/" not in href or href.count("/") < 3:
                 continue
             if href.strip("/") == "immobilie":
@@ -404,23 +650,17 @@ def collect_detail_links_with_images() -> List[tuple]:
             
             # Suche Bild im gleichen Artikel
             image_url = ""
-            img = article.find("img")
-            if img:
+            img = article.find(".//img")
+            if img is not None:
                 # Hole srcset (bevorzugt) oder src
-                srcset = img.get("srcset", "")
+                srcset = img.get("srcset") or ""
                 if srcset:
                     # Parse srcset: "url1 768w, url2 1024w, url3 1920w"
                     # Nimm größte Auflösung (letzter Eintrag)
-                    srcset_parts = [s.strip() for s in srcset.split(",")]
-                    if srcset_parts:
-                        last_part = srcset_parts[-1].strip()
-                        if " " in last_part:
-                            image_url = last_part.split()[0]
-                        else:
-                            image_url = last_part
+                    image_url = _largest_srcset_url(srcset)
                 
                 if not image_url:
-                    src = img.get("src", "")
+                    src = img.get("src") or ""
                     if src:
                         image_url = src
                 
@@ -440,25 +680,32 @@ def collect_detail_links_with_images() -> List[tuple]:
             img_status = "✅" if image_url else "❌"
             print(f"[DEBUG]   {slug[:40]:<40} | Image: {img_status}")
             
-            # Nur hinzufügen wenn noch nicht vorhanden
-            if not any(data[0] == full_url for data in all_data):
+            page_items.append((full_url, image_url))
+
+            # Nur hinzufügen wenn noch nicht vorhanden (O(1) statt Listen-Scan)
+            if full_url not in seen_urls:
+                seen_urls.add(full_url)
                 all_data.append((full_url, image_url))
                 page_data.append(full_url)
-        
+
         print(f"[LIST] Seite {page}: {len(page_data)} neue Immobilien gefunden")
-        
+
+        # Prüfe ob es eine nächste Seite gibt: ein exakter XPath auf den
+        # /page/N+1/-Link (C-Level) statt des Python-Loops über alle Anchors
+        has_next_page = bool(tree.xpath(f'//a[contains(@href, "/page/{page + 1}/")]'))
+
+        # Validatoren + Seiteninhalt für den nächsten Lauf cachen
+        if validators.get("etag") or validators.get("lm"):
+            state[page_url] = {
+                **validators,
+                "items": [list(item) for item in page_items],
+                "has_next": has_next_page,
+            }
+
         if len(page_data) == 0:
             print(f"[LIST] Keine neuen Links auf Seite {page} - Ende der Pagination")
             break
-        
-        # Prüfe ob es eine nächste Seite gibt
-        has_next_page = False
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if f"/page/{page + 1}/" in href or "next" in href.lower():
-                has_next_page = True
-                break
-        
+
         if not has_next_page and len(page_data) < 12:
             print(f"[LIST] Weniger als 12 Links und kein 'Next' Link - letzte Seite erreicht")
             break
@@ -469,31 +716,51 @@ def collect_detail_links_with_images() -> List[tuple]:
             print(f"[WARN] Sicherheits-Break bei Seite 20")
             break
     
+    _save_state(state)
+
     print(f"[LIST] Gesamt gefunden: {len(all_data)} Immobilien über {page} Seite(n)")
     return all_data
 
 def parse_detail(detail_url: str, overview_image: str = "") -> dict:
     """Parse Detailseite"""
-    soup = soup_get(detail_url)
-    page_text = soup.get_text("\n", strip=True)
-    
+    tree = tree_get(detail_url)
+
+    # Regex-Input klein halten: nur Text aus dem Inhaltsbereich statt
+    # der kompletten Seite inkl. Footer/Navigation. Dabei alle Textknoten
+    # mitnehmen - Preis und Adresse stecken oft in div/span/td statt p/li
+    mains = tree.xpath("//main") or tree.xpath("//article")
+    main = mains[0] if mains else tree
+    page_text = "\n".join(_norm(t) for t in main.itertext() if t.strip())
+
     # Titel - meist in H1
     title = ""
-    h1 = soup.find("h1")
-    if h1:
-        title = _norm(h1.get_text(strip=True))
+    h1 = tree.find(".//h1")
+    if h1 is not None:
+        title = _norm(h1.text_content())
     
     # Fallback: Suche nach Muster im Text
     if not title or len(title) < 10:
-        m = re.search(r"(Wohnung|Haus|Villa|Doppelhaushälfte|Einfamilienhaus|Mehrfamilienhaus)\s+(?:in|im)\s+[A-Z][\w\s-]+", page_text)
+        m = RE_TITLE_FALLBACK.search(page_text)
         if m:
             title = m.group(0)
     
     # Objektnummer aus URL
     objektnummer = extract_objektnummer(detail_url)
-    
-    # Preis
-    preis = extract_price(page_text)
+
+    # Preis: zuerst nur im Umfeld des "Kaufpreis"-Labels suchen - der
+    # Regex-Input schrumpft von O(Seite) auf O(Feld); page_text bleibt Fallback
+    preis = ""
+    label_nodes = main.xpath('.//*[text()[contains(., "Kaufpreis")]]')
+    if label_nodes:
+        scope = label_nodes[0].getparent()
+        if scope is None:
+            scope = label_nodes[0]
+        # Textknoten mit Trennzeichen verbinden - text_content() würde
+        # Label und Wert aus Geschwister-Zellen zu "Kaufpreis489.250 €"
+        # verkleben und das Pattern nie matchen lassen
+        preis = extract_price(_norm(" ".join(scope.itertext())))
+    if not preis:
+        preis = extract_price(page_text)
     
     # PLZ/Ort - bei Besigheim oft nur Ortsname
     ort = extract_plz_ort(page_text, title)
@@ -504,25 +771,29 @@ def parse_detail(detail_url: str, overview_image: str = "") -> dict:
     # Nur wenn kein Bild von Übersichtsseite, suche auf Detailseite
     if not image_url:
         print(f"[DEBUG] No overview image, searching on detail page...")
-        for img in soup.find_all("img"):
-            src = img.get("src", "")
-            srcset = img.get("srcset", "")
-            alt = img.get("alt", "").lower()
-            
+        # Kandidaten-Filter komplett in XPath: nur Bilder mit Upload-/
+        # phastpress-Pfad oder srcset erreichen überhaupt Python
+        candidates = tree.xpath(
+            '(//img[contains(@src, "/wp-content/uploads/")'
+            ' or contains(@src, "phastpress")'
+            ' or contains(@src, "phast.php")'
+            ' or @srcset])[position() <= 10]'
+        )
+        for img in candidates:
+            src = img.get("src") or ""
+            srcset = img.get("srcset") or ""
+            alt = img.get("alt") or ""
+
             # Verwende srcset falls vorhanden (bessere Qualität)
             if srcset:
-                srcset_urls = [s.strip().split()[0] for s in srcset.split(",")]
-                if srcset_urls:
-                    src = srcset_urls[-1]  # Größtes Bild
+                src = _largest_srcset_url(srcset)  # Größtes Bild
             
             if not src:
                 continue
             
-            # Ignoriere Logos, Icons, Avatare
-            skip_keywords = ["logo", "icon", "avatar", "favicon"]
-            if any(keyword in alt for keyword in skip_keywords):
-                continue
-            if any(keyword in src.lower() for keyword in skip_keywords):
+            # Ignoriere Logos, Icons, Avatare - ein case-insensitiver
+            # Regex-Scan statt vier Substring-Checks plus src.lower()-Kopie
+            if RE_SKIP_IMG.search(alt) or RE_SKIP_IMG.search(src):
                 continue
             
             # Akzeptiere Bilder die Property-Bilder sein könnten
@@ -540,7 +811,7 @@ def parse_detail(detail_url: str, overview_image: str = "") -> dict:
     kategorie = "Kaufen"
     
     # Beschreibung
-    description = extract_description(soup)
+    description = extract_description(tree)
     
     return {
         "Titel": title,
@@ -582,7 +853,17 @@ def unique_key(fields: dict) -> str:
     url = (fields.get("Webseite") or "").strip()
     if url:
         return f"url:{url}"
-    return f"hash:{hash(json.dumps(fields, sort_keys=True))}"
+    # blake2b statt hash(): deterministisch über Prozessgrenzen hinweg,
+    # sonst würden Fallback-Records bei jedem Lauf neu angelegt/gelöscht.
+    # Felder direkt in den Hash streamen statt erst einen JSON-String
+    # in Record-Größe zu allokieren.
+    h = hashlib.blake2b(digest_size=16)
+    for k in sorted(fields):
+        h.update(k.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(repr(fields[k]).encode("utf-8"))
+        h.update(b"\x00")
+    return f"hash:{h.hexdigest()}"
 
 # ===========================================================================
 # MAIN
@@ -599,76 +880,80 @@ def run():
         print("[WARN] Keine Links gefunden!")
         return
     
-    # Scrape Details
+    # Scrape Details parallel - reine I/O-Wartezeit, Rate-Limit greift in tree_get.
+    # Die CSV wird dabei direkt im Stream geschrieben: jeder fertige Record
+    # landet sofort in der Datei, im Speicher bleibt nur die Liste für den
+    # Airtable-Sync.
+    csv_file = "besigheim_immobilien.csv"
+    cols = ["Titel", "Kategorie", "Webseite", "Objektnummer", "Beschreibung", "Bild", "Preis", "Standort"]
     all_rows = []
-    for i, (url, image_url) in enumerate(detail_data, 1):
-        try:
-            print(f"\n[SCRAPE] {i}/{len(detail_data)} | {url}")
-            row = parse_detail(url, overview_image=image_url)
-            record = make_record(row)
-            
-            # Zeige Vorschau
-            preis_display = record.get('Preis', 'N/A')
-            has_image = "✅" if record.get('Bild') else "❌"
-            print(f"  → {record['Kategorie']:8} | {record['Titel'][:60]} | {record.get('Standort', 'N/A')} | Preis: {preis_display} | Bild: {has_image}")
-            
-            all_rows.append(record)
-        except Exception as e:
-            print(f"[ERROR] Fehler bei {url}: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
-    
+    done = 0
+    with open(csv_file, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            futures = {
+                ex.submit(parse_detail, url, image_url): url
+                for url, image_url in detail_data
+            }
+            for fut in as_completed(futures):
+                url = futures[fut]
+                done += 1
+                try:
+                    row = fut.result()
+                    record = make_record(row)
+
+                    # Zeige Vorschau
+                    preis_display = record.get('Preis', 'N/A')
+                    has_image = "✅" if record.get('Bild') else "❌"
+                    print(f"\n[SCRAPE] {done}/{len(detail_data)} | {url}")
+                    print(f"  → {record['Kategorie']:8} | {record['Titel'][:60]} | {record.get('Standort', 'N/A')} | Preis: {preis_display} | Bild: {has_image}")
+
+                    all_rows.append(record)
+                    w.writerow([record.get(c, "") for c in cols])
+                except Exception as e:
+                    print(f"[ERROR] Fehler bei {url}: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    continue
+
     if not all_rows:
         print("[WARN] Keine Datensätze gefunden.")
         return
-    
-    # Speichere CSV
-    csv_file = "besigheim_immobilien.csv"
-    cols = ["Titel", "Kategorie", "Webseite", "Objektnummer", "Beschreibung", "Bild", "Preis", "Standort"]
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        w.writerows(all_rows)
+
     print(f"\n[CSV] Gespeichert: {csv_file} ({len(all_rows)} Zeilen)")
     
     # Airtable Sync
     if AIRTABLE_TOKEN and AIRTABLE_BASE and airtable_table_segment():
         print("\n[AIRTABLE] Starte Synchronisation...")
         
-        allowed = airtable_existing_fields()
+        # Ein einziger Tabellen-Scan: Feldliste aus demselben Ergebnis ableiten
         all_ids, all_fields = airtable_list_all()
+        allowed = set(all_fields[0].keys()) if all_fields else set()
         
-        existing = {}
-        for rec_id, f in zip(all_ids, all_fields):
-            k = unique_key(f)
-            existing[k] = (rec_id, f)
-        
+        existing = {unique_key(f): (rec_id, f) for rec_id, f in zip(all_ids, all_fields)}
+
+        # Ein Durchlauf über all_rows; Beschreibungslängen werden gecacht
+        # statt pro Duplikat erneut nachgeschlagen
         desired = {}
+        desc_len = {}
         for r in all_rows:
             k = unique_key(r)
-            if k in desired:
-                if len(r.get("Beschreibung", "")) > len(desired[k].get("Beschreibung", "")):
-                    desired[k] = sanitize_record_for_airtable(r, allowed)
-            else:
+            n = len(r.get("Beschreibung", ""))
+            if k not in desired or n > desc_len[k]:
                 desired[k] = sanitize_record_for_airtable(r, allowed)
-        
-        to_create, to_update, keep = [], [], set()
-        for k, fields in desired.items():
-            if k in existing:
-                rec_id, old = existing[k]
-                diff = {fld: val for fld, val in fields.items() if old.get(fld) != val}
-                if diff:
-                    print(f"[DEBUG] Update needed for {k[:30]}: {list(diff.keys())}")
-                    if "Bild" in diff:
-                        print(f"[DEBUG]   Old Bild: {old.get('Bild', 'MISSING')[:80]}")
-                        print(f"[DEBUG]   New Bild: {diff['Bild'][:80]}")
-                    to_update.append({"id": rec_id, "fields": diff})
-                keep.add(k)
-            else:
-                to_create.append(fields)
-        
-        to_delete_ids = [rec_id for k, (rec_id, _) in existing.items() if k not in keep]
+                desc_len[k] = n
+
+        to_create = [fields for k, fields in desired.items() if k not in existing]
+        # Ein existing-Lookup pro Record statt Membership-Test plus
+        # zwei Indexzugriffen; der Feld-Diff bleibt ein Durchlauf
+        to_update = [
+            {"id": pair[0], "fields": diff}
+            for k, fields in desired.items()
+            if (pair := existing.get(k))
+            and (diff := {fld: val for fld, val in fields.items() if pair[1].get(fld) != val})
+        ]
+        to_delete_ids = [rec_id for k, (rec_id, _) in existing.items() if k not in desired]
         
         print(f"\n[SYNC] Gesamt → create: {len(to_create)}, update: {len(to_update)}, delete: {len(to_delete_ids)}")
         